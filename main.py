@@ -6,34 +6,223 @@ Uses Notion's internal API for recursive exports
 
 import os
 import re
+import sys
 import json
+import mmap
+import logging
+import asyncio
+import hashlib
+import hmac
 import time
 import shutil
+import signal
+import struct
+import filecmp
 import zipfile
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import MemoryHandler
+from typing import Callable, Dict, Optional, List, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
 
-import requests
+import ahocorasick
+import httpx
+import pygit2
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 
+logger = logging.getLogger("notion-backup")
+
+
+def flush_logs():
+    """Write out buffered log records, before idle waits and progress bars"""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+class DownloadProgress:
+    """Tracks which bytes of a ranged download are on disk, so entries can be extracted early"""
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._cursors: Dict[int, int] = {}
+        self._central_directory: Optional[int] = None
+        self._closed = False
+        self._success = False
+    
+    def mark_central_directory_ready(self, offset: int):
+        """Record that the ZIP central directory, starting at offset, is on disk"""
+        with self._condition:
+            self._central_directory = offset
+            self._condition.notify_all()
+    
+    def update(self, range_start: int, offset: int):
+        """Record that the range beginning at range_start is on disk up to offset"""
+        with self._condition:
+            self._cursors[range_start] = offset
+            self._condition.notify_all()
+    
+    def close(self, success: bool):
+        """Mark the ranged download as finished; later calls are ignored"""
+        with self._condition:
+            if not self._closed:
+                self._closed = True
+                self._success = success
+                self._condition.notify_all()
+    
+    def _covered(self, start: int, end: int) -> bool:
+        """Whether bytes start..end (exclusive) are all on disk"""
+        covered_to = start
+        for range_start, offset in sorted(self._cursors.items()):
+            if range_start > covered_to:
+                break
+            covered_to = max(covered_to, offset)
+        return covered_to >= end
+    
+    def wait_for_central_directory(self) -> bool:
+        """
+        Block until the central directory is on disk
+        
+        Returns:
+            False if the ranged download ended without providing it
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._central_directory is not None or self._closed)
+            return self._central_directory is not None and (self._success or not self._closed)
+    
+    def wait_for(self, start: int, end: Optional[int]) -> bool:
+        """
+        Block until bytes start..end (exclusive) are on disk
+        
+        Args:
+            start: First byte needed
+            end: End of the span, or None for the start of the central directory
+        
+        Returns:
+            False if the ranged download failed, as the file is then rewritten
+        """
+        with self._condition:
+            if end is None:
+                end = self._central_directory
+            self._condition.wait_for(lambda: self._covered(start, end) or self._closed)
+            return self._success or not self._closed
+
+
 class NotionExporter:
     """Handles Notion export operations using internal API"""
     
     BASE_URL = "https://www.notion.so/api/v3"
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    DOWNLOAD_PARTS = 8
+    ZIP_TAIL_SIZE = 64 * 1024
+    POLL_BASE_DELAY = 2
+    POLL_MAX_DELAY = 30
     
     def __init__(self, token_v2: str, space_id: str):
         self.token_v2 = token_v2
         self.space_id = space_id
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Cookie": f"token_v2={token_v2}",
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"
-        })
+        # HTTP/2 keeps every API call and poll multiplexed on one connection
+        self.session = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+            headers={
+                "Cookie": f"token_v2={token_v2}",
+                "Content-Type": "application/json",
+                "Accept-Encoding": "br, gzip",
+                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"
+            }
+        )
+    
+    @staticmethod
+    def _format_id(notion_id: str) -> str:
+        """Convert a 32-character Notion ID into dashed UUID form"""
+        raw = notion_id.replace("-", "")
+        if len(raw) != 32:
+            return notion_id
+        return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+    
+    def _get_records(self, table: str, record_ids: List[str]) -> Dict[str, dict]:
+        """
+        Fetch record values from Notion
+        
+        Args:
+            table: Record table ('block' or 'space')
+            record_ids: IDs of the records to fetch
+        
+        Returns:
+            Mapping of record ID to record value
+        """
+        response = self.session.post(
+            f"{self.BASE_URL}/syncRecordValues",
+            json={
+                "requests": [
+                    {"pointer": {"table": table, "id": self._format_id(record_id)}, "version": -1}
+                    for record_id in record_ids
+                ]
+            },
+            timeout=30
+        )
+        response.raise_for_status()
+        records = response.json().get("recordMap", {}).get(table, {})
+        
+        values = {}
+        for record_id, record in records.items():
+            value = record.get("value", {})
+            # Newer responses wrap the value one level deeper
+            if "value" in value:
+                value = value["value"]
+            values[record_id] = value
+        return values
+    
+    def get_change_token(self, page_id: Optional[str] = None) -> Optional[str]:
+        """
+        Build a token that changes whenever the exported pages are edited
+        
+        For a single page this is its last_edited_time. For the whole space it
+        is a hash of every top-level page ID and its last_edited_time. Edits
+        that only touch nested sub-pages are not reflected in the token.
+        
+        Args:
+            page_id: Specific page to check (None = entire space)
+        
+        Returns:
+            Change token, or None if it could not be determined
+        """
+        try:
+            if page_id:
+                pages = self._get_records("block", [page_id])
+            else:
+                space = self._get_records("space", [self.space_id])
+                page_ids = next(iter(space.values()), {}).get("pages", [])
+                if not page_ids:
+                    return None
+                pages = self._get_records("block", page_ids)
+            
+            edited = sorted(
+                f"{record_id}:{value.get('last_edited_time')}"
+                for record_id, value in pages.items()
+            )
+            requested = 1 if page_id else len(set(page_ids))
+            if len(pages) < requested or any(
+                value.get('last_edited_time') is None for value in pages.values()
+            ):
+                # A record we cannot read would pin the token to a constant
+                return None
+            
+            if page_id:
+                return edited[0]
+            return hashlib.sha256("\n".join(edited).encode()).hexdigest()
+            
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"[Warning] Could not check Notion for changes: {e}")
+            return None
     
     def export_space(
         self,
@@ -82,11 +271,11 @@ class NotionExporter:
             task_payload["task"]["request"]["exportType"] = "currentView"
             task_payload["task"]["request"]["blockId"] = page_id
         
-        print(f"[Notion] Triggering export...")
-        print(f"  - Type: {export_type}")
-        print(f"  - Recursive: {recursive}")
-        print(f"  - Include files: {include_files}")
-        print(f"  - Page ID: {page_id or 'Entire workspace'}")
+        logger.info(f"[Notion] Triggering export...")
+        logger.info(f"  - Type: {export_type}")
+        logger.info(f"  - Recursive: {recursive}")
+        logger.info(f"  - Include files: {include_files}")
+        logger.info(f"  - Page ID: {page_id or 'Entire workspace'}")
         
         try:
             # Enqueue the export task
@@ -100,254 +289,883 @@ class NotionExporter:
             
             task_id = data.get("taskId")
             if not task_id:
-                print(f"[Error] No taskId in response: {data}")
+                logger.error(f"[Error] No taskId in response: {data}")
                 return None
             
-            print(f"[Notion] Export task created: {task_id}")
+            logger.info(f"[Notion] Export task created: {task_id}")
             
             # Poll for completion
-            download_url = self._poll_export_status(task_id)
-            return download_url
+            download_urls = self._poll_export_status([task_id])
+            return download_urls.get(task_id)
             
-        except requests.exceptions.RequestException as e:
-            print(f"[Error] Failed to trigger export: {e}")
+        except httpx.HTTPError as e:
+            logger.error(f"[Error] Failed to trigger export: {e}")
             return None
     
-    def _poll_export_status(self, task_id: str, max_attempts: int = 60) -> Optional[str]:
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff delay for the given attempt, capped at POLL_MAX_DELAY"""
+        return min(self.POLL_MAX_DELAY, self.POLL_BASE_DELAY * 2 ** min(attempt, 5))
+    
+    def _poll_export_status(self, task_ids: List[str], max_seconds: int = 600) -> Dict[str, str]:
         """
-        Poll task status until export is ready
+        Poll task status until exports are ready
+        
+        All pending tasks are checked with a single getTasks call per poll.
+        Polls start every 2 seconds and back off exponentially up to 30 seconds,
+        so small exports are picked up quickly without hammering the API.
         
         Args:
-            task_id: The export task ID
-            max_attempts: Maximum polling attempts (1 attempt = 10 seconds)
+            task_ids: The export task IDs
+            max_seconds: Wall-clock budget for the exports to complete
         
         Returns:
-            Download URL when ready
+            Mapping of task ID to download URL for every export that completed
         """
-        print("[Notion] Waiting for export to complete...")
+        logger.info("[Notion] Waiting for export to complete...")
+        
+        deadline = time.monotonic() + max_seconds
+        pending = set(task_ids)
+        urls: Dict[str, str] = {}
+        attempt = 0
+        errors = 0
         
-        for attempt in range(max_attempts):
+        while pending and time.monotonic() < deadline:
+            flush_logs()
             try:
                 response = self.session.post(
                     f"{self.BASE_URL}/getTasks",
-                    json={"taskIds": [task_id]},
+                    json={"taskIds": sorted(pending)},
                     timeout=30
                 )
                 response.raise_for_status()
                 data = response.json()
+                errors = 0
                 
                 # Debug: Print raw response on first attempt
-                if attempt == 0:
-                    print(f"[Debug] Raw API response: {json.dumps(data, indent=2)[:500]}...")
+                if attempt == 0 and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[Debug] Raw API response: {json.dumps(data, indent=2)[:500]}...")
                 
                 results = data.get("results", [])
                 if not results:
-                    print(f"[Warning] No results for task {task_id}")
-                    time.sleep(10)
-                    continue
-                
-                task = results[0]
-                
-                # Debug: Show task structure
-                if attempt < 3:
-                    print(f"[Debug] Task keys: {list(task.keys())}")
-                
-                status = task.get("status", {})
-                state = status.get("type")
-                
-                # Try alternative keys for state
-                if not state:
-                    state = task.get("state") or status.get("state")
-                
-                # Debug: Show status structure
-                if attempt < 3:
-                    print(f"[Debug] Status: {json.dumps(status, indent=2)[:300]}")
+                    logger.warning(f"[Warning] No results for tasks {sorted(pending)}")
                 
-                if state == "complete":
-                    export_url = status.get("exportURL")
-                    if export_url:
-                        print(f"[Notion] Export ready! URL obtained.")
-                        return export_url
+                for task in results:
+                    task_id = task.get("id")
+                    if task_id not in pending:
+                        # Fall back to request order if the task has no usable ID
+                        if len(pending) != 1:
+                            continue
+                        task_id = next(iter(pending))
+                    
+                    # Debug: Show task structure
+                    if attempt < 3:
+                        logger.debug(f"[Debug] Task keys: {list(task.keys())}")
+                    
+                    status = task.get("status", {})
+                    state = status.get("type")
+                    
+                    # Try alternative keys for state
+                    if not state:
+                        state = task.get("state") or status.get("state")
+                    
+                    # Debug: Show status structure
+                    if attempt < 3 and logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"[Debug] Status: {json.dumps(status, indent=2)[:300]}")
+                    
+                    if state == "complete":
+                        pending.discard(task_id)
+                        export_url = status.get("exportURL")
+                        if export_url:
+                            logger.info(f"[Notion] Export ready! URL obtained.")
+                            urls[task_id] = export_url
+                        else:
+                            logger.error("[Error] Export complete but no URL found")
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(f"[Debug] Full status: {json.dumps(status, indent=2)}")
+                    
+                    elif state == "failure":
+                        pending.discard(task_id)
+                        error = status.get("error", "Unknown error")
+                        logger.error(f"[Error] Export failed: {error}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"[Debug] Full response: {json.dumps(task, indent=2)}")
+                    
                     else:
-                        print("[Error] Export complete but no URL found")
-                        print(f"[Debug] Full status: {json.dumps(status, indent=2)}")
-                        return None
-                
-                elif state == "failure":
-                    error = status.get("error", "Unknown error")
-                    print(f"[Error] Export failed: {error}")
-                    print(f"[Debug] Full response: {json.dumps(data, indent=2)}")
-                    return None
+                        # Still in progress
+                        progress = status.get("pagesExported", 0)
+                        logger.info(f"  [{attempt+1}] Status: {state}, Pages: {progress}")
                 
-                else:
-                    # Still in progress
-                    progress = status.get("pagesExported", 0)
-                    print(f"  [{attempt+1}/{max_attempts}] Status: {state}, Pages: {progress}")
-                    time.sleep(10)
+                if pending:
+                    time.sleep(self._backoff_delay(attempt))
+                    attempt += 1
             
-            except requests.exceptions.RequestException as e:
-                print(f"[Error] Polling failed: {e}")
-                time.sleep(10)
+            except httpx.HTTPError as e:
+                logger.error(f"[Error] Polling failed: {e}")
+                # Back off harder on consecutive request errors
+                errors += 1
+                time.sleep(self._backoff_delay(attempt + errors))
+                attempt += 1
         
-        print("[Error] Export timeout - max attempts reached")
-        return None
+        if pending:
+            logger.error(f"[Error] Export timeout - not ready after {max_seconds} seconds")
+        return urls
     
-    def download_export(self, url: str, output_path: str) -> bool:
+    def download_export(
+        self,
+        url: str,
+        output_path: str,
+        progress: Optional[DownloadProgress] = None
+    ) -> bool:
         """
         Download the export ZIP file
         
+        Large exports are fetched as DOWNLOAD_PARTS parallel byte ranges when
+        the server supports Range requests, otherwise in a single stream.
+        
         Args:
             url: Download URL from Notion
             output_path: Local path to save ZIP
+            progress: Receives ranged download progress, so the ZIP can be
+                extracted while it downloads. Closed with success=False when
+                the download falls back to a single stream.
         
         Returns:
             True if successful
         """
-        print(f"[Download] Fetching export file...")
+        logger.info(f"[Download] Fetching export file...")
+        flush_logs()
+        
+        try:
+            total_size = self._probe_range_support(url)
+            
+            downloaded = False
+            if total_size and total_size >= self.DOWNLOAD_PARTS * self.DOWNLOAD_CHUNK_SIZE:
+                logger.info(f"[Download] Fetching {self.DOWNLOAD_PARTS} ranges in parallel...")
+                downloaded = asyncio.run(
+                    self._download_ranges(url, output_path, total_size, progress)
+                )
+                if not downloaded:
+                    logger.warning("[Warning] Ranged download incomplete, falling back to a single stream")
+            
+            if progress:
+                progress.close(downloaded)
+            
+            if not downloaded:
+                self._download_sequential(url, output_path)
+            
+            logger.info(f"[Download] Saved to {output_path}")
+            return True
+            
+        except httpx.HTTPError as e:
+            logger.error(f"[Error] Download failed: {e}")
+            return False
+        
+        finally:
+            # Never leave a waiting extraction blocked
+            if progress:
+                progress.close(False)
+    
+    def _probe_range_support(self, url: str) -> Optional[int]:
+        """
+        Check whether the download URL serves byte ranges
+        
+        Presigned export URLs are usually only valid for GET, so this requests
+        the first byte instead of sending a HEAD request.
+        
+        Returns:
+            Total size of the file if ranges are supported, else None
+        """
+        with self.session.stream(
+            "GET", url, headers={"Range": "bytes=0-0", "Accept-Encoding": "identity"}
+        ) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return None
+            
+            # Content-Range: bytes 0-0/<total>
+            total = response.headers.get("content-range", "").rpartition("/")[2]
+            return int(total) if total.isdigit() else None
+    
+    def get_export_digest(self, url: str) -> Optional[str]:
+        """
+        Fingerprint an export from its ZIP central directory alone
+        
+        Only the tail of the file is fetched, so an export whose entries are
+        unchanged since the last backup can be skipped without downloading it.
+        
+        Args:
+            url: Download URL from Notion
         
+        Returns:
+            Hex digest of every entry's name, CRC and size, or None if the
+            server does not serve byte ranges or the ZIP could not be parsed
+        """
         try:
-            response = self.session.get(url, stream=True, timeout=300)
+            total_size = self._probe_range_support(url)
+            if not total_size:
+                return None
+            
+            tail_start = max(0, total_size - self.ZIP_TAIL_SIZE)
+            tail = self._get_range(url, tail_start, total_size - 1)
+            directory_start = self._central_directory_offset(tail, tail_start) if tail else None
+            if directory_start is None:
+                return None
+            
+            if directory_start < tail_start:
+                # Central directory is larger than the tail we fetched
+                head = self._get_range(url, directory_start, tail_start - 1)
+                if head is None:
+                    return None
+                directory = head + tail
+            else:
+                directory = tail[directory_start - tail_start:]
+            
+            return self._central_directory_digest(directory)
+            
+        except httpx.HTTPError as e:
+            logger.warning(f"[Warning] Could not fetch export directory: {e}")
+            return None
+    
+    def _get_range(self, url: str, start: int, end: int) -> Optional[bytes]:
+        """Fetch an inclusive byte range, or None if the server ignored the range"""
+        response = self.session.get(
+            url, headers={"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+        )
+        response.raise_for_status()
+        if response.status_code != 206 or len(response.content) != end - start + 1:
+            return None
+        return response.content
+    
+    @staticmethod
+    def _central_directory_digest(directory: bytes) -> Optional[str]:
+        """
+        Hash the entries of a ZIP central directory
+        
+        Timestamps are left out, since every export is stamped with the time
+        Notion built it.
+        
+        Returns:
+            Hex digest, or None if the directory holds no entries
+        """
+        digest = hashlib.sha256()
+        position = 0
+        entries = 0
+        
+        while directory[position:position + 4] == b"PK\x01\x02":
+            if len(directory) < position + 46:
+                return None
+            crc, _, size, name_length, extra_length, comment_length = struct.unpack_from(
+                "<LLLHHH", directory, position + 16
+            )
+            name = directory[position + 46:position + 46 + name_length]
+            digest.update(struct.pack("<LLH", crc, size, name_length) + name)
+            position += 46 + name_length + extra_length + comment_length
+            entries += 1
+        
+        return digest.hexdigest() if entries else None
+    
+    def _download_sequential(self, url: str, output_path: str):
+        """Stream the whole file over a single connection"""
+        with self.session.stream("GET", url, timeout=300) as response:
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
             
-            with open(output_path, 'wb') as f:
-                with tqdm(total=total_size, unit='iB', unit_scale=True) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
+            with open(output_path, 'wb', buffering=self.DOWNLOAD_CHUNK_SIZE) as f:
+                with tqdm(total=total_size, unit='iB', unit_scale=True, mininterval=1.0) as pbar:
+                    for chunk in response.iter_bytes(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
                         size = f.write(chunk)
                         pbar.update(size)
+    
+    async def _download_ranges(
+        self,
+        url: str,
+        output_path: str,
+        total_size: int,
+        progress: Optional[DownloadProgress] = None
+    ) -> bool:
+        """
+        Fetch the file as parallel byte ranges written at their offsets
+        
+        With a progress tracker, the ZIP central directory is fetched first so
+        entries can be extracted while the remaining ranges download.
+        
+        Returns:
+            True if every range was received in full
+        """
+        with open(output_path, 'w+b') as f:
+            f.truncate(total_size)
+            fd = f.fileno()
             
-            print(f"[Download] Saved to {output_path}")
-            return True
+            with tqdm(total=total_size, unit='iB', unit_scale=True, mininterval=1.0) as pbar:
+                # HTTP/1.1 on purpose: over HTTP/2 every range would be multiplexed
+                # onto one connection, losing the parallel flows
+                async with httpx.AsyncClient(
+                    http2=False,
+                    limits=httpx.Limits(max_connections=self.DOWNLOAD_PARTS),
+                    follow_redirects=True,
+                    timeout=300.0,
+                    headers=self.session.headers
+                ) as client:
+                    body_size = total_size
+                    if progress:
+                        directory_start = await self._fetch_central_directory(
+                            client, url, fd, total_size, pbar
+                        )
+                        if directory_start is not None:
+                            progress.mark_central_directory_ready(directory_start)
+                            body_size = directory_start
+                    
+                    part_size = max(1, -(-body_size // self.DOWNLOAD_PARTS))
+                    ranges = [
+                        (start, min(start + part_size, body_size) - 1)
+                        for start in range(0, body_size, part_size)
+                    ]
+                    
+                    results = await asyncio.gather(*(
+                        self._fetch_range(client, url, fd, start, end, pbar, progress)
+                        for start, end in ranges
+                    ))
+        
+        return all(results)
+    
+    async def _fetch_central_directory(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        fd: int,
+        total_size: int,
+        pbar: tqdm
+    ) -> Optional[int]:
+        """
+        Download everything from the ZIP central directory to the end of file
+        
+        Returns:
+            Offset of the central directory, or None if it could not be located
+        """
+        tail_start = max(0, total_size - self.ZIP_TAIL_SIZE)
+        if not await self._fetch_range(client, url, fd, tail_start, total_size - 1, pbar):
+            return None
+        
+        tail = os.pread(fd, total_size - tail_start, tail_start)
+        directory_start = self._central_directory_offset(tail, tail_start)
+        if directory_start is None or directory_start >= tail_start:
+            return directory_start
+        
+        # Central directory is larger than the tail we fetched
+        if not await self._fetch_range(client, url, fd, directory_start, tail_start - 1, pbar):
+            return None
+        return directory_start
+    
+    @staticmethod
+    def _central_directory_offset(tail: bytes, tail_start: int) -> Optional[int]:
+        """
+        Locate the central directory from the end of a ZIP file
+        
+        Args:
+            tail: Last bytes of the ZIP file, including the end of central directory record
+            tail_start: Offset of tail within the file
+        
+        Returns:
+            Offset of the central directory, or None if it could not be parsed
+        """
+        end_record = tail.rfind(b"PK\x05\x06")
+        if end_record < 0 or len(tail) - end_record < 22:
+            return None
+        
+        directory_start = struct.unpack("<L", tail[end_record + 16:end_record + 20])[0]
+        if directory_start != 0xFFFFFFFF:
+            return directory_start
+        
+        # ZIP64: follow the locator to the ZIP64 end of central directory record
+        locator = end_record - 20
+        if locator < 0 or tail[locator:locator + 4] != b"PK\x06\x07":
+            return None
+        zip64_record = struct.unpack("<Q", tail[locator + 8:locator + 16])[0] - tail_start
+        if zip64_record < 0 or tail[zip64_record:zip64_record + 4] != b"PK\x06\x06":
+            return None
+        return struct.unpack("<Q", tail[zip64_record + 48:zip64_record + 56])[0]
+    
+    async def _fetch_range(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        fd: int,
+        start: int,
+        end: int,
+        pbar: tqdm,
+        progress: Optional[DownloadProgress] = None
+    ) -> bool:
+        """
+        Download bytes start..end (inclusive) into fd at the same offset
+        
+        Returns:
+            True if the full range was received
+        """
+        headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+        async with client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return False
             
-        except requests.exceptions.RequestException as e:
-            print(f"[Error] Download failed: {e}")
-            return False
+            offset = start
+            async for chunk in response.aiter_bytes(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+                pbar.update(len(chunk))
+                if progress:
+                    progress.update(start, offset)
+        
+        return offset == end + 1
 
 
 class FileProcessor:
     """Cleans up Notion export files"""
     
-    UUID_PATTERN = re.compile(r'\s+[a-f0-9]{32}$|\s+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$')
+    HEX_DIGITS = '0123456789abcdef'
+    UUID_SEPARATORS = ' \t\n\r\f\v'
+    LINK_UUID_PATTERN = re.compile(rb'[a-f0-9]{32}|[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}')
+    EXTRACT_BUFFER_SIZE = 1024 * 1024
     
-    @staticmethod
-    def unzip_export(zip_path: str, extract_to: str) -> Optional[str]:
+    def unzip_export(
+        self,
+        zip_path: str,
+        extract_to: str,
+        wait_for_bytes: Optional[Callable[[int, Optional[int]], bool]] = None
+    ) -> Optional[Tuple[str, Dict[str, str], List[str]]]:
         """
-        Extract ZIP file and return the root export directory
+        Extract ZIP file with UUIDs stripped from every path component
+        
+        Entries are streamed straight to their cleaned destination, so the
+        extracted tree never needs a separate rename pass.
         
         Args:
             zip_path: Path to ZIP file
             extract_to: Directory to extract to
+            wait_for_bytes: Called with the byte span of each entry before it
+                is read (end None = up to the central directory). Blocks until
+                the span is downloaded; returning False aborts extraction.
         
         Returns:
-            Path to extracted root directory
+            Tuple of (extracted root directory, mapping of old paths to new paths,
+            extracted Markdown files)
         """
-        print(f"[Extract] Unzipping export...")
+        logger.info(f"[Extract] Unzipping export...")
+        
+        dest_root = Path(extract_to)
+        dest_root.mkdir(parents=True, exist_ok=True)
+        # Paths are built as plain strings; Path objects per entry add up on large exports
+        root = str(dest_root)
+        root_path = os.path.abspath(root)
+        rename_map: Dict[str, str] = {}
+        markdown_files: List[str] = []
+        dir_map: Dict[Tuple[str, ...], str] = {(): root}
+        dir_children: Dict[str, Set[str]] = {}
         
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_to)
+            # Read unbuffered while downloading, so no stale read-ahead is reused
+            buffering = 0 if wait_for_bytes else -1
+            with open(zip_path, 'rb', buffering=buffering) as zip_file, \
+                    zipfile.ZipFile(zip_file, 'r') as zip_ref:
+                # Extract in file order so a download in progress is read front to back
+                members = sorted(zip_ref.infolist(), key=lambda info: info.header_offset)
+                member_parts = [
+                    tuple(part for part in info.filename.split('/') if part) for info in members
+                ]
+                
+                # Names that need no cleaning keep priority in their directory, so
+                # a cleaned name never overwrites them, whichever comes first
+                reserved: Dict[Tuple[str, ...], Set[str]] = {}
+                seen: Set[Tuple[str, ...]] = set()
+                for parts in member_parts:
+                    for depth in range(len(parts)):
+                        path = parts[:depth + 1]
+                        if path in seen:
+                            continue
+                        seen.add(path)
+                        if self.clean_filename(parts[depth]) == parts[depth]:
+                            reserved.setdefault(parts[:depth], set()).add(parts[depth])
+                dir_children[root] = set(os.listdir(root)) | reserved.get((), set())
+                
+                for index, (info, parts) in enumerate(zip(members, member_parts)):
+                    if wait_for_bytes:
+                        end = members[index + 1].header_offset if index + 1 < len(members) else None
+                        if not wait_for_bytes(info.header_offset, end):
+                            logger.info("[Extract] Download interrupted, stopping extraction")
+                            return None
+                    
+                    if not parts:
+                        continue
+                    if '..' in parts or '.' in parts:
+                        # Never write outside the extraction root
+                        logger.warning(f"  [Warning] Skipping unsafe ZIP entry: {info.filename}")
+                        continue
+                    
+                    if info.is_dir():
+                        self._extract_dir(parts, root, dir_map, dir_children, reserved, rename_map)
+                        continue
+                    
+                    parent = self._extract_dir(parts[:-1], root, dir_map, dir_children, reserved, rename_map)
+                    target = self._clean_path(
+                        parent, parts[-1], os.path.join(root, *parts), dir_children, rename_map
+                    )
+                    if os.path.commonpath([root_path, os.path.abspath(target)]) != root_path:
+                        logger.warning(f"  [Warning] Skipping unsafe ZIP entry: {info.filename}")
+                        continue
+                    
+                    with zip_ref.open(info) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.EXTRACT_BUFFER_SIZE)
+                    if target.endswith('.md'):
+                        markdown_files.append(target)
             
             # Find the root export directory (usually named "Export-...")
-            extracted_items = list(Path(extract_to).iterdir())
+            extracted_items = list(dest_root.iterdir())
             if extracted_items:
                 root_dir = extracted_items[0]
-                print(f"[Extract] Root directory: {root_dir}")
-                return str(root_dir)
+                logger.info(f"[Extract] Root directory: {root_dir}")
+                return str(root_dir), rename_map, markdown_files
             
-            return extract_to
+            return extract_to, rename_map, markdown_files
             
         except zipfile.BadZipFile as e:
-            print(f"[Error] Invalid ZIP file: {e}")
+            logger.error(f"[Error] Invalid ZIP file: {e}")
             return None
     
+    def _extract_dir(
+        self,
+        parts: Tuple[str, ...],
+        dest_root: str,
+        dir_map: Dict[Tuple[str, ...], str],
+        dir_children: Dict[str, Set[str]],
+        reserved: Dict[Tuple[str, ...], Set[str]],
+        rename_map: Dict[str, str]
+    ) -> str:
+        """
+        Create the cleaned directory for a ZIP directory path
+        
+        Args:
+            parts: Original path components of the directory
+            dest_root: Extraction root
+            dir_map: Cache of original component tuples to cleaned directories
+            dir_children: Cache of the names present in each cleaned directory
+            reserved: Names needing no cleaning, by original parent directory
+            rename_map: Mapping of old to new paths, updated in place
+        
+        Returns:
+            Path of the cleaned directory
+        """
+        cleaned = dir_map.get(parts)
+        if cleaned is None:
+            parent = self._extract_dir(
+                parts[:-1], dest_root, dir_map, dir_children, reserved, rename_map
+            )
+            cleaned = self._clean_path(
+                parent, parts[-1], os.path.join(dest_root, *parts), dir_children, rename_map
+            )
+            try:
+                os.mkdir(cleaned)
+            except FileExistsError:
+                pass
+            dir_map[parts] = cleaned
+            dir_children[cleaned] = set(os.listdir(cleaned)) | reserved.get(parts, set())
+        return cleaned
+    
+    def _clean_path(
+        self,
+        parent: str,
+        old_name: str,
+        old_path: str,
+        dir_children: Dict[str, Set[str]],
+        rename_map: Dict[str, str]
+    ) -> str:
+        """
+        Pick the UUID-free destination for an entry, avoiding naming conflicts
+        
+        Args:
+            parent: Cleaned parent directory
+            old_name: Original entry name
+            old_path: Original entry path, used as the rename_map key
+            dir_children: Cache of the names present in each cleaned directory,
+                so conflicts are checked without a stat per candidate
+            rename_map: Mapping of old to new paths, updated in place
+        
+        Returns:
+            Destination path for the entry
+        """
+        children = dir_children.get(parent)
+        if children is None:
+            children = dir_children[parent] = set(os.listdir(parent))
+        
+        new_name = self.clean_filename(old_name)
+        if new_name in ('', '.', '..'):
+            # A bare UUID would leave no name, or one that walks the tree
+            new_name = old_name
+        candidate = new_name
+        
+        if old_name != new_name:
+            # Handle naming conflicts
+            counter = 1
+            while candidate in children:
+                name, ext = os.path.splitext(new_name)
+                candidate = f"{name}_{counter}{ext}"
+                counter += 1
+            logger.debug(f"  Renamed: {old_name} → {candidate}")
+        
+        children.add(candidate)
+        new_path = os.path.join(parent, candidate)
+        
+        if new_path != old_path:
+            rename_map[old_path] = new_path
+        
+        return new_path
+    
     @staticmethod
     def clean_filename(filename: str) -> str:
         """Remove Notion UUID from filename"""
         name, ext = os.path.splitext(filename)
-        cleaned = FileProcessor.UUID_PATTERN.sub('', name)
+        
+        # Scan back from the end for whitespace + 32 hex digits or a dashed
+        # UUID; slicing and str.strip run in C, unlike a regex search per call
+        start = len(name) - 32
+        if start > 0 and name[start - 1] in FileProcessor.UUID_SEPARATORS:
+            suffix = name[start:]
+        else:
+            start = len(name) - 36
+            if start <= 0 or name[start - 1] not in FileProcessor.UUID_SEPARATORS:
+                return filename
+            suffix = name[start:]
+            if suffix[8] != '-' or suffix[13] != '-' or suffix[18] != '-' or suffix[23] != '-':
+                return filename
+            suffix = suffix.replace('-', '')
+            if len(suffix) != 32:
+                return filename
+        
+        if suffix.strip(FileProcessor.HEX_DIGITS):
+            return filename
+        
+        cleaned = name[:start].rstrip(FileProcessor.UUID_SEPARATORS)
         return f"{cleaned}{ext}"
     
-    def rename_files_and_folders(self, root_path: str) -> Dict[str, str]:
+    def fix_markdown_links(
+        self,
+        root_path: str,
+        rename_map: Dict[str, str],
+        markdown_files: Optional[List[str]] = None
+    ):
         """
-        Recursively rename all files and folders to remove UUIDs
+        Fix internal links in Markdown files to match new filenames
+        
+        All old names are compiled into a single Aho-Corasick automaton so
+        each file is rewritten in one linear scan, however many entries were
+        renamed.
         
         Args:
             root_path: Root directory to process
-        
-        Returns:
-            Mapping of old paths to new paths
+            rename_map: Mapping of old to new paths
+            markdown_files: Markdown files to process, as listed during
+                extraction; if None, root_path is searched for them
         """
-        print("[Cleanup] Removing UUIDs from filenames...")
+        logger.info("[Cleanup] Fixing Markdown links...")
+        
+        # Map raw and URL-encoded old names to their replacements
+        name_map = {}
+        for old_path, new_path in rename_map.items():
+            old_name = os.path.basename(old_path)
+            new_name = os.path.basename(new_path)
+            if old_name == new_name:
+                # Only the parent directory was renamed
+                continue
+            name_map[old_name] = new_name
+            if ' ' in old_name:
+                name_map[old_name.replace(' ', '%20')] = new_name.replace(' ', '%20')
         
-        rename_map = {}
-        root = Path(root_path)
+        if not name_map:
+            return
         
-        # Process in reverse depth order (deepest first)
-        all_paths = sorted(root.rglob("*"), key=lambda p: len(p.parts), reverse=True)
+        # Files are matched as Latin-1 text, where each character is one byte,
+        # so names are keyed by their UTF-8 bytes in the same form
+        automaton = ahocorasick.Automaton()
+        for old_name, new_name in name_map.items():
+            old_key = old_name.encode('utf-8').decode('latin-1')
+            automaton.add_word(old_key, (len(old_key), new_name.encode('utf-8').decode('latin-1')))
+        automaton.make_automaton()
         
-        for old_path in all_paths:
-            if not old_path.exists():
-                continue
+        if markdown_files is None:
+            markdown_files = [str(path) for path in Path(root_path).rglob("*.md")]
+        else:
+            # An entry written twice must not be rewritten by two workers at once
+            markdown_files = list(dict.fromkeys(markdown_files))
+        
+        def fix_file(md_file: str):
+            self._fix_markdown_file(Path(md_file), automaton)
+        
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fix_file, markdown_files))
+    
+    def _fix_markdown_file(self, md_file: Path, automaton: ahocorasick.Automaton):
+        """
+        Rewrite links in a single Markdown file, writing only if it changed
+        
+        Args:
+            md_file: Markdown file to process
+            automaton: Old names, each mapped to (length, new name)
+        """
+        try:
+            # Every old name carries a Notion UUID; scan the mapped file for one
+            # before copying its contents into a string
+            with open(md_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if not self.LINK_UUID_PATTERN.search(mm):
+                        return
             
-            old_name = old_path.name
-            new_name = self.clean_filename(old_name)
+            # Latin-1 maps bytes to characters one to one, which is cheaper than
+            # UTF-8 decoding and round-trips any byte sequence unchanged
+            content = md_file.read_bytes().decode('latin-1')
             
-            if old_name != new_name:
-                new_path = old_path.parent / new_name
-                
-                # Handle naming conflicts
-                counter = 1
-                while new_path.exists():
-                    name, ext = os.path.splitext(new_name)
-                    new_path = old_path.parent / f"{name}_{counter}{ext}"
-                    counter += 1
-                
-                try:
-                    old_path.rename(new_path)
-                    rename_map[str(old_path)] = str(new_path)
-                    print(f"  Renamed: {old_name} → {new_name}")
-                except Exception as e:
-                    print(f"  [Warning] Could not rename {old_name}: {e}")
+            # Leftmost-longest matches, so a name never shadows a longer one it prefixes
+            pieces = []
+            position = 0
+            for end, (length, new_name) in automaton.iter_long(content):
+                pieces.append(content[position:end - length + 1])
+                pieces.append(new_name)
+                position = end + 1
+            
+            if pieces:
+                pieces.append(content[position:])
+                md_file.write_bytes(''.join(pieces).encode('latin-1'))
+                logger.debug(f"  Fixed links in: {md_file.name}")
         
-        return rename_map
+        except Exception as e:
+            logger.warning(f"  [Warning] Could not process {md_file.name}: {e}")
     
-    def fix_markdown_links(self, root_path: str, rename_map: Dict[str, str]):
+    def mirror_tree(self, src_path: str, dest_path: str) -> List[str]:
         """
-        Fix internal links in Markdown files to match new filenames
+        Make dest_path match src_path, only touching entries that differ
+        
+        Files are compared by content, so unchanged files keep their inode and
+        mtime and Git does not need to rehash them. New or changed files are
+        hard-linked rather than copied when both trees share a filesystem, and
+        src_path may be consumed in the process. The top-level .git directory
+        of dest_path is left alone.
         
         Args:
-            root_path: Root directory to process
-            rename_map: Mapping of old to new paths
+            src_path: Directory with the new content
+            dest_path: Directory to update
+        
+        Returns:
+            Relative paths that were added, updated or removed
         """
-        print("[Cleanup] Fixing Markdown links...")
+        if shutil.which("rsync"):
+            return self._mirror_rsync(src_path, dest_path)
+        return self._mirror_python(src_path, dest_path)
+    
+    def _mirror_rsync(self, src_path: str, dest_path: str) -> List[str]:
+        """Mirror with rsync, returning the itemized changes"""
+        # -ii itemizes every entry, so files hard-linked through --link-dest are
+        # reported too; -8 keeps non-ASCII names unescaped
+        cmd = ["rsync", "-rlc8", "-ii", "--delete", "--exclude=/.git", "--out-format=%i %n"]
+        if os.stat(src_path).st_dev == os.stat(dest_path).st_dev:
+            # Hard-link new files to the source instead of copying their data
+            cmd.append(f"--link-dest={os.path.abspath(src_path)}")
         
-        root = Path(root_path)
-        markdown_files = list(root.rglob("*.md"))
+        result = subprocess.run(
+            cmd + [f"{src_path}/", f"{dest_path}/"],
+            capture_output=True,
+            text=True,
+            errors="surrogateescape"
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"rsync failed: {result.stderr.strip()}")
         
-        for md_file in markdown_files:
-            try:
-                content = md_file.read_text(encoding='utf-8')
-                original_content = content
-                
-                # Fix relative links
-                for old_path, new_path in rename_map.items():
-                    old_name = Path(old_path).name
-                    new_name = Path(new_path).name
-                    
-                    # Replace URL-encoded and regular links
-                    content = content.replace(
-                        old_name.replace(' ', '%20'),
-                        new_name.replace(' ', '%20')
-                    )
-                    content = content.replace(old_name, new_name)
+        changed = []
+        for line in result.stdout.splitlines():
+            # Itemized lines are an 11 character change summary then the path;
+            # unchanged entries are a "." and the file type followed by blanks
+            summary, path = line[:11], line[12:]
+            if summary.startswith("*deleting"):
+                changed.append(path.rstrip("/"))
+            elif summary[1:2] != "d" and (summary[0] != "." or summary[2:].strip(" .")):
+                changed.append(path)
+        return changed
+    
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path):
+        """Replace target with a hard link to source, copying across filesystems"""
+        if os.path.lexists(target):
+            target.unlink()
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+    
+    def _mirror_python(self, src_path: str, dest_path: str) -> List[str]:
+        """Mirror with a pure Python walk, used when rsync is not installed"""
+        changed: List[str] = []
+        self._mirror_dir(src_path, dest_path, "", changed)
+        return changed
+    
+    def _mirror_dir(self, src_dir: str, dest_dir: str, rel_dir: str, changed: List[str]):
+        """
+        Mirror one directory level, then descend into directories on both sides
+        
+        Each directory is listed once on each side with os.scandir, whose
+        entries carry their file type, so removals and copies share one pass.
+        
+        Args:
+            src_dir: Source directory
+            dest_dir: Matching destination directory
+            rel_dir: Path of both relative to the mirror roots
+            changed: Relative paths that were added, updated or removed
+        """
+        with os.scandir(src_dir) as entries:
+            src_entries = {entry.name: entry for entry in entries}
+        with os.scandir(dest_dir) as entries:
+            dest_entries = {entry.name: entry for entry in entries}
+        if not rel_dir:
+            dest_entries.pop(".git", None)
+        
+        # Remove entries that no longer exist in the source
+        for name, entry in dest_entries.items():
+            if name not in src_entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+                changed.append(os.path.join(rel_dir, name))
+        
+        # Bring in new and modified entries
+        for name, source in src_entries.items():
+            rel_path = os.path.join(rel_dir, name)
+            target = dest_entries.get(name)
+            target_path = os.path.join(dest_dir, name)
+            
+            if source.is_dir(follow_symlinks=False):
+                if target is not None and target.is_dir(follow_symlinks=False):
+                    self._mirror_dir(source.path, target_path, rel_path, changed)
+                    continue
+                if target is not None:
+                    os.unlink(target_path)
                 
-                if content != original_content:
-                    md_file.write_text(content, encoding='utf-8')
-                    print(f"  Fixed links in: {md_file.name}")
+                # Directories missing from dest are moved over with a single rename
+                try:
+                    os.rename(source.path, target_path)
+                except OSError:
+                    os.mkdir(target_path)
+                    self._mirror_dir(source.path, target_path, rel_path, changed)
+                changed.append(rel_path)
+                continue
             
-            except Exception as e:
-                print(f"  [Warning] Could not process {md_file.name}: {e}")
+            if target is not None:
+                if target.is_dir(follow_symlinks=False):
+                    shutil.rmtree(target_path)
+                elif os.path.exists(target_path) and filecmp.cmp(source.path, target_path, shallow=False):
+                    continue
+            
+            self._link_or_copy(Path(source.path), Path(target_path))
+            changed.append(rel_path)
 
 
 class GitManager:
@@ -358,13 +1176,21 @@ class GitManager:
         self.remote_url = remote_url
         self.user_name = user_name
         self.user_email = user_email
+        self._initialized = False
+        self._repo: Optional[pygit2.Repository] = None
+        self._push_process: Optional[subprocess.Popen] = None
+        # Keep git commands from taking optional locks on the index, which
+        # in-process staging may be writing while a push runs
+        self._env = {**os.environ, "GIT_OPTIONAL_LOCKS": "0"}
     
-    def _run_command(self, cmd: List[str]) -> Tuple[bool, str]:
+    def _run_command(self, cmd: List[str], input: Optional[str] = None) -> Tuple[bool, str]:
         """Execute git command and return success status"""
         try:
             result = subprocess.run(
                 cmd,
                 cwd=self.repo_path,
+                env=self._env,
+                input=input,
                 capture_output=True,
                 text=True,
                 timeout=300
@@ -375,96 +1201,336 @@ class GitManager:
         except Exception as e:
             return False, str(e)
     
+    @staticmethod
+    def _quote_config_value(value: str) -> str:
+        """Quote a value for inclusion in a git config file"""
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+    
+    def _write_config(self):
+        """Append user identity and remote to .git/config in a single write"""
+        config = (
+            "[user]\n"
+            f"\tname = {self._quote_config_value(self.user_name)}\n"
+            f"\temail = {self._quote_config_value(self.user_email)}\n"
+            '[remote "origin"]\n'
+            f"\turl = {self._quote_config_value(self.remote_url)}\n"
+            "\tfetch = +refs/heads/*:refs/remotes/origin/*\n"
+        )
+        with open(self.repo_path / ".git" / "config", "a", encoding="utf-8") as f:
+            f.write(config)
+    
+    def _update_config(self):
+        """Bring an existing repository's identity and remote in line with the settings"""
+        config = self.repo.config
+        for key, value in (("user.name", self.user_name), ("user.email", self.user_email)):
+            if key not in config or config[key] != value:
+                config[key] = value
+        
+        try:
+            remote = self.repo.remotes["origin"]
+        except KeyError:
+            self.repo.remotes.create("origin", self.remote_url)
+        else:
+            if remote.url != self.remote_url:
+                self.repo.remotes.set_url("origin", self.remote_url)
+    
     def initialize_repo(self) -> bool:
         """Initialize or clone the repository"""
-        print(f"[Git] Initializing repository at {self.repo_path}...")
+        if self._initialized:
+            return True
+        
+        logger.info(f"[Git] Initializing repository at {self.repo_path}...")
         
         self.repo_path.mkdir(parents=True, exist_ok=True)
         
         # Check if already a git repo
         if (self.repo_path / ".git").exists():
-            print("[Git] Repository already initialized")
+            logger.info("[Git] Repository already initialized")
+            try:
+                self._update_config()
+            except pygit2.GitError as e:
+                logger.error(f"[Error] Git config update failed: {e}")
+                return False
+            self._initialized = True
             return True
         
         # Initialize new repo
         success, output = self._run_command(["git", "init"])
         if not success:
-            print(f"[Error] Git init failed: {output}")
+            logger.error(f"[Error] Git init failed: {output}")
             return False
         
-        # Configure user
-        self._run_command(["git", "config", "user.name", self.user_name])
-        self._run_command(["git", "config", "user.email", self.user_email])
-        
-        # Add remote
-        self._run_command(["git", "remote", "add", "origin", self.remote_url])
+        # Configure user and remote
+        self._write_config()
         
         # Try to pull existing content
-        print("[Git] Attempting to pull existing content...")
+        logger.info("[Git] Attempting to pull existing content...")
         self._run_command(["git", "pull", "origin", "main", "--allow-unrelated-histories"])
         
+        self._initialized = True
+        return True
+    
+    @property
+    def repo(self) -> pygit2.Repository:
+        """The repository opened through libgit2, cached across backups"""
+        if self._repo is None:
+            self._repo = pygit2.Repository(str(self.repo_path))
+        return self._repo
+    
+    def _stage(self, index: pygit2.Index, paths: List[str]):
+        """
+        Make the index match the working tree at and below each path
+        
+        Args:
+            index: Index to update
+            paths: Paths relative to the repository root
+        """
+        exact = set(paths)
+        prefixes = tuple(f"{path}/" for path in paths)
+        
+        # Drop entries whose file was deleted or replaced by a directory
+        for entry in list(index):
+            if entry.path in exact or entry.path.startswith(prefixes):
+                full_path = self.repo_path / entry.path
+                if not (full_path.is_symlink() or full_path.is_file()):
+                    index.remove(entry.path)
+        
+        for path in paths:
+            full_path = self.repo_path / path
+            if full_path.is_symlink() or full_path.is_file():
+                index.add(path)
+            elif full_path.is_dir():
+                for dirpath, dirnames, filenames in os.walk(full_path):
+                    rel_dir = os.path.relpath(dirpath, self.repo_path)
+                    # Symlinked directories are committed as links, like files
+                    links = [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]
+                    for name in filenames + links:
+                        index.add(os.path.join(rel_dir, name))
+    
+    def _commit(self, message: str, changed_paths: Optional[List[str]]) -> bool:
+        """
+        Stage changes and commit them to the main branch
+        
+        Args:
+            message: Commit message
+            changed_paths: Paths to stage, or None to stage the whole tree
+        
+        Returns:
+            True if a commit was created, False if the tree was unchanged
+        """
+        repo = self.repo
+        index = repo.index
+        # Pick up changes made by git commands since the last backup
+        index.read()
+        
+        if changed_paths is None:
+            logger.info("[Git] Staging all changes...")
+            top_level = {name for name in os.listdir(self.repo_path) if name != ".git"}
+            top_level.update(entry.path.split("/", 1)[0] for entry in index)
+            changed_paths = sorted(top_level)
+        else:
+            logger.info(f"[Git] Staging {len(changed_paths)} changed paths...")
+        
+        self._stage(index, changed_paths)
+        index.write()
+        tree = index.write_tree()
+        
+        parents = [] if repo.head_is_unborn else [repo.head.target]
+        if parents and repo[parents[0]].tree_id == tree:
+            return False
+        
+        logger.info("[Git] Committing...")
+        signature = pygit2.Signature(self.user_name, self.user_email)
+        repo.create_commit("refs/heads/main", signature, signature, message, tree, parents)
+        if repo.head_is_unborn or repo.head.name != "refs/heads/main":
+            repo.set_head("refs/heads/main")
+        return True
+    
+    def _is_pushed(self) -> bool:
+        """Whether origin already has the local main branch, as of the last push or pull"""
+        local = self.repo.references.get("refs/heads/main")
+        if local is None:
+            # Nothing has been committed yet, so there is nothing to push
+            return True
+        remote = self.repo.references.get("refs/remotes/origin/main")
+        return remote is not None and local.target == remote.target
+    
+    @property
+    def push_in_progress(self) -> bool:
+        """Whether a background push has been started and not yet waited for"""
+        return self._push_process is not None
+    
+    def wait_for_push(self) -> Optional[bool]:
+        """
+        Wait for the push started by commit_and_push to finish
+        
+        Returns:
+            True if it succeeded, False if it failed, None if no push was running
+        """
+        process = self._push_process
+        if process is None:
+            return None
+        
+        try:
+            _, output = process.communicate(timeout=300)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            output = "Command timeout"
+        finally:
+            self._push_process = None
+        
+        if process.returncode != 0:
+            logger.error(f"[Error] Git push failed: {output}")
+            return False
+        
+        logger.info("[Git] Successfully pushed changes!")
         return True
     
-    def commit_and_push(self, message: Optional[str] = None) -> bool:
+    def cancel_push(self):
+        """Terminate the background push, if one is running; wait_for_push reports it as failed"""
+        process = self._push_process
+        if process is not None and process.poll() is None:
+            process.terminate()
+    
+    def commit_and_push(
+        self,
+        message: Optional[str] = None,
+        changed_paths: Optional[List[str]] = None,
+        background: bool = False
+    ) -> bool:
         """
         Add, commit, and push changes
         
         Args:
             message: Commit message (auto-generated if None)
+            changed_paths: Paths known to have changed; only these are staged.
+                If None, the whole working tree is checked and staged.
+            background: Return once the push has started; wait_for_push
+                reports its outcome. Any earlier push is waited for first,
+                so at most one runs at a time.
         
         Returns:
-            True if successful
+            True if successful (or, in the background, if the push started)
         """
+        self.wait_for_push()
+        
         if message is None:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             message = f"Automated backup: {timestamp}"
         
-        print(f"[Git] Checking for changes...")
+        # Stage and commit in-process; only the push needs the git CLI
+        try:
+            committed = changed_paths != [] and self._commit(message, changed_paths)
+            if not committed:
+                logger.info("[Git] No changes to commit")
+                # An unchanged tree needs no git process at all, unless an
+                # earlier push failed and left commits behind
+                if self._is_pushed():
+                    return True
+        except pygit2.GitError as e:
+            logger.error(f"[Error] Git commit failed: {e}")
+            return False
+        
+        # Push
+        logger.info("[Git] Pushing to remote...")
+        try:
+            self._push_process = subprocess.Popen(
+                ["git", "push", "-q", "origin", "main"],
+                cwd=self.repo_path,
+                env=self._env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except OSError as e:
+            logger.error(f"[Error] Git push failed: {e}")
+            return False
         
-        # Check if there are changes
-        success, output = self._run_command(["git", "status", "--porcelain"])
-        if not output.strip():
-            print("[Git] No changes to commit")
+        if background:
             return True
+        return bool(self.wait_for_push())
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """
+    Accepts Notion webhook deliveries and wakes the scheduler
+    
+    Requests must carry the server's secret as ?token=. Once the subscription's
+    verification token is configured, deliveries must also carry a valid
+    X-Notion-Signature, the HMAC-SHA256 of the body keyed by that token.
+    """
+    
+    PATH = "/notion-webhook"
+    MAX_BODY_SIZE = 1024 * 1024
+    
+    def _reply(self, status: int):
+        self.send_response(status)
+        self.end_headers()
+    
+    def do_POST(self):
+        url = urlsplit(self.path)
+        token = parse_qs(url.query).get("token", [""])[0]
+        if url.path != self.PATH or not hmac.compare_digest(token.encode(), self.server.secret.encode()):
+            self._reply(404)
+            return
         
-        print(f"[Git] Changes detected:\n{output[:500]}")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400)
+            return
+        if length > self.MAX_BODY_SIZE:
+            self._reply(413)
+            return
+        body = self.rfile.read(length)
         
-        # Add all changes
-        print("[Git] Staging changes...")
-        success, output = self._run_command(["git", "add", "."])
-        if not success:
-            print(f"[Error] Git add failed: {output}")
-            return False
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
         
-        # Commit
-        print("[Git] Committing...")
-        success, output = self._run_command(["git", "commit", "-m", message])
-        if not success and "nothing to commit" not in output.lower():
-            print(f"[Error] Git commit failed: {output}")
-            return False
+        # Notion's one-time verification request carries the token to paste back
+        # into the subscription; it is never signed and never starts a backup
+        if isinstance(payload, dict) and "verification_token" in payload:
+            logger.info(f"[Webhook] Verification token received: {payload['verification_token']}")
+            logger.info("[Webhook] Set NOTION_WEBHOOK_VERIFICATION_TOKEN to it to check signatures")
+            flush_logs()
+            self._reply(200)
+            return
         
-        # Push
-        print("[Git] Pushing to remote...")
-        success, output = self._run_command(["git", "push", "origin", "main"])
-        if not success:
-            # Try creating main branch if it doesn't exist
-            self._run_command(["git", "branch", "-M", "main"])
-            success, output = self._run_command(["git", "push", "-u", "origin", "main"])
-            
-            if not success:
-                print(f"[Error] Git push failed: {output}")
-                return False
+        verification_token = self.server.verification_token
+        if verification_token:
+            expected = "sha256=" + hmac.new(
+                verification_token.encode(), body, hashlib.sha256
+            ).hexdigest()
+            signature = self.headers.get("X-Notion-Signature", "")
+            # Compare bytes: compare_digest rejects non-ASCII str with a TypeError
+            if not hmac.compare_digest(signature.encode("utf-8", "surrogateescape"), expected.encode()):
+                logger.warning("[Webhook] Rejected delivery with an invalid signature")
+                self._reply(401)
+                return
         
-        print("[Git] Successfully pushed changes!")
-        return True
+        self._reply(202)
+        self.server.on_delivery()
+    
+    def log_message(self, format, *args):
+        logger.debug(f"[Webhook] {format % args}")
 
 
 class BackupOrchestrator:
     """Main orchestrator for the backup process"""
     
+    # Seconds a push may keep running after a stop signal; Docker kills after 10
+    SHUTDOWN_PUSH_GRACE = 5
+    # Seconds a webhook-triggered backup waits for further deliveries, unless
+    # FOLLOWUP_INTERVAL_MINUTES is set
+    WEBHOOK_DEBOUNCE = 60
+    
     def __init__(self):
-        load_dotenv()
-        
         # Load configuration
         self.notion_token = os.getenv("NOTION_TOKEN_V2")
         self.space_id = os.getenv("NOTION_SPACE_ID")
@@ -474,15 +1540,36 @@ class BackupOrchestrator:
         self.git_user = os.getenv("GIT_USER_NAME", "Notion Backup Bot")
         self.git_email = os.getenv("GIT_USER_EMAIL", "backup@example.com")
         self.interval_hours = int(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+        self.max_interval_hours = int(os.getenv("MAX_BACKUP_INTERVAL_HOURS") or self.interval_hours)
+        self.webhook_port = int(os.getenv("WEBHOOK_PORT") or 0)
+        self.followup_minutes = int(os.getenv("FOLLOWUP_INTERVAL_MINUTES") or 0)
+        self.webhook_secret = os.getenv("WEBHOOK_SECRET", "")
+        self.webhook_verification_token = os.getenv("NOTION_WEBHOOK_VERIFICATION_TOKEN", "")
         
         # Export options
         self.export_type = os.getenv("EXPORT_TYPE", "markdown")
         self.include_files = os.getenv("INCLUDE_FILES", "true").lower() == "true"
         self.recursive = os.getenv("RECURSIVE", "true").lower() == "true"
         self.timezone = os.getenv("TIMEZONE", "America/New_York")
+        # Off by default: the change token misses edits made only in nested sub-pages
+        self.incremental = os.getenv("INCREMENTAL", "false").lower() == "true"
+        self._last_sync: Optional[str] = None
+        self._last_digest: Optional[str] = None
+        self._stop_event = threading.Event()
+        # Set on shutdown and on webhook deliveries to cut the scheduler's wait short
+        self._wake_event = threading.Event()
+        self._last_run_changed = False
+        # Whether everything mirrored so far has been committed; until a cycle
+        # commits, the working tree may hold changes no later mirror reports
+        self._tree_committed = False
+        self._push_watcher: Optional[threading.Thread] = None
         
         self.validate_config()
         
+        # Load the last backup's state once; later runs compare against memory
+        self._load_last_sync()
+        self._load_export_digest()
+        
         # Initialize components
         self.exporter = NotionExporter(self.notion_token, self.space_id)
         self.processor = FileProcessor()
@@ -505,19 +1592,118 @@ class BackupOrchestrator:
         if missing:
             raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
     
+    @property
+    def last_sync_file(self) -> Path:
+        """File holding the Notion change token of the last pushed backup"""
+        return Path(self.repo_path) / ".git" / "notion-last-sync"
+    
+    @staticmethod
+    def _read_state(path: Path) -> str:
+        """Read a state file in one call, treating a missing file as empty"""
+        try:
+            return path.read_text().strip()
+        except FileNotFoundError:
+            return ""
+    
+    def _load_last_sync(self) -> Optional[str]:
+        """Return the change token of the last pushed backup, reading the file only once"""
+        if self._last_sync is None:
+            self._last_sync = self._read_state(self.last_sync_file)
+        return self._last_sync or None
+    
+    def _save_last_sync(self, change_token: str):
+        """Remember the change token of a successfully pushed backup"""
+        self.last_sync_file.write_text(change_token)
+        self._last_sync = change_token
+    
+    @property
+    def export_digest_file(self) -> Path:
+        """File holding the ZIP central directory digest of the last pushed backup"""
+        return Path(self.repo_path) / ".git" / "notion-export-digest"
+    
+    def _load_export_digest(self) -> Optional[str]:
+        """Return the export digest of the last pushed backup, reading the file only once"""
+        if self._last_digest is None:
+            self._last_digest = self._read_state(self.export_digest_file)
+        return self._last_digest or None
+    
+    def _save_export_digest(self, digest: str):
+        """Remember the export digest of a successfully pushed backup"""
+        self.export_digest_file.write_text(digest)
+        self._last_digest = digest
+    
+    def _finish_push(self, change_token: Optional[str], export_digest: Optional[str]):
+        """Wait for the background push, then record the backup's state if it landed"""
+        if self.git_manager.wait_for_push():
+            if change_token:
+                self._save_last_sync(change_token)
+            if export_digest:
+                self._save_export_digest(export_digest)
+        flush_logs()
+    
+    def _wait_for_push_watcher(self):
+        """Block until the previous backup's push, if any, has finished"""
+        if self._push_watcher:
+            self._push_watcher.join()
+            self._push_watcher = None
+    
+    def _stop_push_watcher(self):
+        """Give a running push a short grace period on shutdown, then cancel it"""
+        if self._push_watcher:
+            self._push_watcher.join(self.SHUTDOWN_PUSH_GRACE)
+            if self._push_watcher.is_alive():
+                logger.warning("[Shutdown] Push still running, cancelling it")
+                self.git_manager.cancel_push()
+            self._wait_for_push_watcher()
+    
+    def _extract_while_downloading(
+        self,
+        zip_path: str,
+        extract_to: str,
+        progress: DownloadProgress
+    ) -> Optional[Tuple[str, Dict[str, str], List[str]]]:
+        """
+        Extract the export as its bytes arrive from a ranged download
+        
+        Returns:
+            Same as FileProcessor.unzip_export, or None if the download did not
+            allow overlapping extraction
+        """
+        if not progress.wait_for_central_directory():
+            return None
+        
+        try:
+            return self.processor.unzip_export(zip_path, extract_to, wait_for_bytes=progress.wait_for)
+        except Exception as e:
+            # The file may be rewritten underneath us by a fallback download
+            logger.warning(f"[Warning] Extraction during download failed: {e}")
+            return None
+    
     def run_backup(self) -> bool:
         """Execute a single backup cycle"""
-        print("\n" + "="*60)
-        print(f"BACKUP STARTED: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*60 + "\n")
+        logger.info("\n" + "="*60)
+        logger.info(f"BACKUP STARTED: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info("="*60 + "\n")
         
+        self._last_run_changed = False
         temp_dir = Path("/tmp/notion_export")
         zip_path = temp_dir / "export.zip"
+        extract_dir = temp_dir / "export"
         
         try:
             # Ensure temp directory exists
             temp_dir.mkdir(parents=True, exist_ok=True)
             
+            # Step 0: Skip the export if nothing changed since the last backup
+            change_token = None
+            if self.incremental:
+                change_token = self.exporter.get_change_token(self.page_id)
+                # The previous push must land before its state can be compared against
+                self._wait_for_push_watcher()
+                if change_token and change_token == self._load_last_sync():
+                    logger.info("[Sync] No changes in Notion since last backup, skipping export")
+                    return True
+            
             # Step 1: Export from Notion
             download_url = self.exporter.export_space(
                 page_id=self.page_id,
@@ -528,110 +1714,239 @@ class BackupOrchestrator:
             )
             
             if not download_url:
-                print("[Error] Failed to get export URL")
+                logger.error("[Error] Failed to get export URL")
                 return False
             
-            # Step 2: Download export
-            if not self.exporter.download_export(download_url, str(zip_path)):
-                print("[Error] Failed to download export")
+            # Skip the download if the export holds exactly the last backup's files
+            export_digest = self.exporter.get_export_digest(download_url)
+            self._wait_for_push_watcher()
+            if export_digest and export_digest == self._load_export_digest():
+                logger.info("[Sync] Export matches last backup, skipping download")
+                if change_token:
+                    self._save_last_sync(change_token)
+                return True
+            
+            # Step 2: Download export, extracting entries as they arrive
+            progress = DownloadProgress()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                extraction = executor.submit(
+                    self._extract_while_downloading, str(zip_path), str(extract_dir), progress
+                )
+                downloaded = self.exporter.download_export(download_url, str(zip_path), progress)
+                extracted = extraction.result()
+            
+            if not downloaded:
+                logger.error("[Error] Failed to download export")
                 return False
             
-            # Step 3: Extract
-            extracted_path = self.processor.unzip_export(str(zip_path), str(temp_dir))
-            if not extracted_path:
-                print("[Error] Failed to extract export")
+            # Step 3: Extract with UUIDs stripped from filenames, unless already done
+            if not extracted:
+                shutil.rmtree(extract_dir, ignore_errors=True)
+                extracted = self.processor.unzip_export(str(zip_path), str(extract_dir))
+            if not extracted:
+                logger.error("[Error] Failed to extract export")
                 return False
+            extracted_path, rename_map, markdown_files = extracted
             
-            # Step 4: Clean up files
-            rename_map = self.processor.rename_files_and_folders(extracted_path)
-            self.processor.fix_markdown_links(extracted_path, rename_map)
+            # Step 4: Fix links to renamed files
+            self.processor.fix_markdown_links(extracted_path, rename_map, markdown_files)
             
             # Step 5: Initialize Git repo
             if not self.git_manager.initialize_repo():
-                print("[Error] Failed to initialize Git repository")
+                logger.error("[Error] Failed to initialize Git repository")
                 return False
             
-            # Step 6: Clear old content and copy new
-            print("[Sync] Replacing repository content...")
-            repo_path = Path(self.repo_path)
-            
-            # Remove old content (except .git)
-            for item in repo_path.iterdir():
-                if item.name != ".git":
-                    if item.is_dir():
-                        shutil.rmtree(item)
-                    else:
-                        item.unlink()
-            
-            # Copy new content
-            for item in Path(extracted_path).iterdir():
-                dest = repo_path / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest)
-                else:
-                    shutil.copy2(item, dest)
+            # Step 6: Mirror new content into the repository
+            logger.info("[Sync] Updating repository content...")
+            stage_all = not self._tree_committed
+            self._tree_committed = False
+            changed = self.processor.mirror_tree(extracted_path, self.repo_path)
+            logger.info(f"[Sync] {len(changed)} paths added, updated or removed")
             
-            # Step 7: Commit and push
-            if not self.git_manager.commit_and_push():
-                print("[Error] Failed to commit and push changes")
+            # Step 7: Commit, then push while the scheduler waits for the next run
+            self._wait_for_push_watcher()
+            # After a restart or a failed cycle, stage the whole tree so changes
+            # mirrored before the failure are committed too
+            staged_paths = None if stage_all else changed
+            if not self.git_manager.commit_and_push(changed_paths=staged_paths, background=True):
+                logger.error("[Error] Failed to commit and push changes")
                 return False
+            self._tree_committed = True
+            self._last_run_changed = bool(changed)
+            
+            if self.git_manager.push_in_progress:
+                # State is only recorded once the push has landed
+                self._push_watcher = threading.Thread(
+                    target=self._finish_push, args=(change_token, export_digest), name="push"
+                )
+                self._push_watcher.start()
+            else:
+                if change_token:
+                    self._save_last_sync(change_token)
+                if export_digest:
+                    self._save_export_digest(export_digest)
             
-            print("\n" + "="*60)
-            print("BACKUP COMPLETED SUCCESSFULLY")
-            print("="*60 + "\n")
+            logger.info("\n" + "="*60)
+            logger.info("BACKUP COMPLETED SUCCESSFULLY")
+            logger.info("="*60 + "\n")
             return True
             
         except Exception as e:
-            print(f"\n[Error] Backup failed with exception: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"\n[Error] Backup failed with exception: {e}")
             return False
         
         finally:
             # Cleanup
             if temp_dir.exists():
                 shutil.rmtree(temp_dir, ignore_errors=True)
+            flush_logs()
+    
+    def _handle_shutdown(self, signum, frame):
+        """Signal handler that wakes the scheduler so it can exit"""
+        self._stop_event.set()
+        self._wake_event.set()
+    
+    def _start_webhook_server(self) -> Optional[ThreadingHTTPServer]:
+        """Listen for Notion webhook deliveries if WEBHOOK_PORT is set"""
+        if not self.webhook_port:
+            return None
+        if not self.webhook_secret:
+            logger.error("[Error] WEBHOOK_PORT is set without WEBHOOK_SECRET, not starting the webhook listener")
+            return None
+        
+        server = ThreadingHTTPServer(("", self.webhook_port), WebhookHandler)
+        server.secret = self.webhook_secret
+        server.verification_token = self.webhook_verification_token
+        server.on_delivery = self._wake_event.set
+        threading.Thread(target=server.serve_forever, name="webhook", daemon=True).start()
+        logger.info(f"[Webhook] Listening on port {self.webhook_port} at {WebhookHandler.PATH}")
+        if not self.webhook_verification_token:
+            logger.warning("[Warning] NOTION_WEBHOOK_VERIFICATION_TOKEN is not set, webhook signatures are not checked")
+        return server
     
     def run_forever(self):
-        """Run backup loop indefinitely"""
-        print("="*60)
-        print("NOTION BACKUP SERVICE STARTED")
-        print(f"Backup interval: {self.interval_hours} hours")
-        print("="*60)
+        """
+        Run backup loop until interrupted or sent SIGTERM
+        
+        Backups that find nothing changed double the wait before the next one,
+        up to MAX_BACKUP_INTERVAL_HOURS. A change or a webhook delivery resets
+        it to BACKUP_INTERVAL_HOURS; a delivery also starts a backup once no
+        further delivery has arrived for FOLLOWUP_INTERVAL_MINUTES (or
+        WEBHOOK_DEBOUNCE seconds), so a burst of edits costs one export.
+        With FOLLOWUP_INTERVAL_MINUTES set, a backup that found changes is
+        followed up that soon, since edits tend to come in bursts.
+        """
+        logger.info("="*60)
+        logger.info("NOTION BACKUP SERVICE STARTED")
+        logger.info(f"Backup interval: {self.interval_hours} hours")
+        if self.max_interval_hours > self.interval_hours:
+            logger.info(f"Idle backoff up to: {self.max_interval_hours} hours")
+        logger.info("="*60)
+        
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        webhook_server = self._start_webhook_server()
+        
+        # Set up the repository once; backups only retry this if it failed here
+        if not self.git_manager.initialize_repo():
+            logger.error("[Error] Failed to initialize Git repository")
         
-        while True:
+        base_interval = self.interval_hours * 3600
+        max_interval = max(base_interval, self.max_interval_hours * 3600)
+        followup = min(self.followup_minutes * 60, base_interval)
+        webhook_delay = followup or self.WEBHOOK_DEBOUNCE
+        interval = base_interval
+        after_change = False
+        # Runs are scheduled on a fixed monotonic grid so backup time doesn't add drift
+        next_run = time.monotonic()
+        
+        while not self._stop_event.is_set():
             try:
+                lag = time.monotonic() - next_run
+                if lag > 60:
+                    logger.info(f"[Scheduler] Backup started {lag:.0f}s behind schedule")
+                
                 success = self.run_backup()
                 
-                if success:
-                    print(f"\n[Scheduler] Next backup in {self.interval_hours} hours...")
+                if success and not self._last_run_changed and not after_change:
+                    interval = min(interval * 2, max_interval)
                 else:
-                    print(f"\n[Scheduler] Backup failed. Retrying in {self.interval_hours} hours...")
+                    interval = base_interval
+                after_change = success and self._last_run_changed
                 
-                time.sleep(self.interval_hours * 3600)
+                if after_change and followup:
+                    next_run = time.monotonic() + followup
+                    logger.info(f"\n[Scheduler] Changes found, checking again in {followup / 60:g} minutes...")
+                else:
+                    next_run += interval
+                    if next_run <= time.monotonic():
+                        # A backup overran the interval; skip the missed slots
+                        next_run = time.monotonic() + interval
+                    
+                    if success:
+                        logger.info(f"\n[Scheduler] Next backup in {interval / 3600:g} hours...")
+                    else:
+                        logger.info(f"\n[Scheduler] Backup failed. Retrying in {interval / 3600:g} hours...")
                 
             except KeyboardInterrupt:
-                print("\n\n[Shutdown] Received interrupt signal. Exiting gracefully...")
+                logger.info("\n\n[Shutdown] Received interrupt signal. Exiting gracefully...")
                 break
             except Exception as e:
-                print(f"\n[Error] Unexpected error in main loop: {e}")
-                print(f"[Scheduler] Retrying in 1 hour...")
-                time.sleep(3600)
+                logger.error(f"\n[Error] Unexpected error in main loop: {e}")
+                logger.info(f"[Scheduler] Retrying in 1 hour...")
+                next_run = time.monotonic() + 3600
+            
+            flush_logs()
+            scheduled_run = next_run
+            try:
+                while (self._wake_event.wait(max(0, next_run - time.monotonic()))
+                        and not self._stop_event.is_set()):
+                    self._wake_event.clear()
+                    now = time.monotonic()
+                    # A delivery resets the interval, so the regular slot comes
+                    # no later than one base interval after the first delivery
+                    interval = base_interval
+                    scheduled_run = min(scheduled_run, now + base_interval)
+                    # Each delivery pushes the backup back, never past that slot
+                    next_run = min(scheduled_run, now + webhook_delay)
+                    logger.info(f"[Webhook] Change notification received, backing up in {webhook_delay:g}s unless more arrive")
+                    flush_logs()
+            except KeyboardInterrupt:
+                logger.info("\n\n[Shutdown] Received interrupt signal. Exiting gracefully...")
+                break
+        
+        if webhook_server:
+            webhook_server.shutdown()
+        self._stop_push_watcher()
+        if self._stop_event.is_set():
+            logger.info("\n\n[Shutdown] Received stop signal. Exiting gracefully...")
+        logger.info("[Shutdown] Backup service stopped")
+        flush_logs()
+
+
+def configure_logging():
+    """Log to stdout through a buffer that is written out in batches"""
+    handler = MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.ERROR,
+        target=logging.StreamHandler(sys.stdout)
+    )
+    logger.addHandler(handler)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
 
 
 def main():
     """Entry point"""
+    load_dotenv()
+    configure_logging()
     try:
         orchestrator = BackupOrchestrator()
         orchestrator.run_forever()
     except ValueError as e:
-        print(f"\n[Configuration Error] {e}")
-        print("Please check your .env file and ensure all required variables are set.")
+        logger.error(f"\n[Configuration Error] {e}")
+        logger.info("Please check your .env file and ensure all required variables are set.")
         exit(1)
     except Exception as e:
-        print(f"\n[Fatal Error] {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n[Fatal Error] {e}")
         exit(1)
 
 